@@ -18,4 +18,5 @@ echo "Building for production..."
 npm run build
 
 echo "Frontend build complete! Static files are in ../static/"
+echo "Restart the dashboard to serve the new build."
 cd ..
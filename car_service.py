@@ -1,5 +1,7 @@
+import os
 import time
 import sys
+import subprocess
 import serial
 import busio
 import board
@@ -10,47 +12,98 @@ import adafruit_rfm9x
 GPS_PORT = "/dev/ttyUSB0"
 GPS_BAUD = 9600
 
+# Seconds between attempts to reopen a missing or unplugged GPS receiver
+GPS_REOPEN_INTERVAL = 30.0
+
+# Longest wait for a valid RMC fix, and how long "Transmitting..." stays up after a send
+GPS_FIX_TIMEOUT = 3.0
+TX_HOLD = 1.0
+
+# Seconds between the start of consecutive LoRa transmissions; covers the
+# worst-case cycle (no fix) plus margin for the send and display repaints,
+# so the schedule is only missed when something actually stalls
+TX_INTERVAL = GPS_FIX_TIMEOUT + TX_HOLD + 0.5
+
+# Only RMC sentences carry the fix we need; every other sentence is skipped
+# without being decoded or split
+RMC_PREFIXES = (b"$GPRMC", b"$GNRMC")
+MINUTES_TO_DEGREES = 1.0 / 60.0
+
 def nmea_to_decimal(coord_str, direction):
+    """Convert an NMEA ddmm.mmmm / dddmm.mmmm bytes field to decimal degrees."""
     if not coord_str or not direction or len(coord_str) < 4:
         return None
 
-    deg_len = 2 if direction in ("N", "S") else 3
-
+    # ddmm.mmmm is degrees * 100 + minutes; divmod avoids slicing on the degree width
     try:
-        degrees = int(coord_str[:deg_len])
-        minutes = float(coord_str[deg_len:])
+        degrees, minutes = divmod(float(coord_str), 100.0)
     except ValueError:
         return None
 
-    decimal = degrees + minutes / 60.0
-    if direction in ("S", "W"):
+    decimal = degrees + minutes * MINUTES_TO_DEGREES
+    if direction in (b"S", b"W"):
         decimal = -decimal
     return decimal
 
 
-def fetch_gps_coordinates(timeout_sec=3):
-    """Read a single GPS fix; return (lat, lon) or (0, 0) on failure."""
+def _tune_serial_latency(port):
+    """
+    Drop the USB-serial latency timer from the 16 ms kernel default to 1 ms,
+    so NMEA sentences are handed to us as soon as they arrive.
+    Best effort: needs write access to sysfs, otherwise falls back to setserial.
+    """
+    tty = os.path.basename(os.path.realpath(port))
     try:
-        with serial.Serial(GPS_PORT, GPS_BAUD, timeout=1) as ser:
-            ser.reset_input_buffer()
-            deadline = time.time() + timeout_sec
-            while time.time() < deadline:
-                line = ser.readline().decode("ascii", errors="ignore").strip()
-                if not line:
-                    continue
-                if not (line.startswith("$GPRMC") or line.startswith("$GNRMC")):
-                    continue
-
-                parts = line.split(",")
-                if len(parts) < 12 or parts[2] != "A":
-                    continue
-
-                lat = nmea_to_decimal(parts[3], parts[4])
-                lon = nmea_to_decimal(parts[5], parts[6])
-                if lat is not None and lon is not None:
-                    return lat, lon
+        with open(f"/sys/bus/usb-serial/devices/{tty}/latency_timer", "w") as f:
+            f.write("1")
+        return
+    except OSError:
+        pass
+
+    try:
+        subprocess.run(["setserial", port, "low_latency"], check=True, capture_output=True)
+    except (OSError, subprocess.CalledProcessError) as exc:
+        print(f"[GPS] Could not set low latency on {port}: {exc}")
+
+
+def open_gps(log_errors=True):
+    """Open the GPS serial port and tune its latency; None on failure."""
+    try:
+        ser = serial.Serial(GPS_PORT, GPS_BAUD, timeout=0.2)
+    except serial.SerialException as exc:
+        if log_errors:
+            print(f"[GPS] Error opening {GPS_PORT}: {exc}")
+        return None
+    _tune_serial_latency(GPS_PORT)
+    return ser
+
+
+def fetch_gps_coordinates(ser, timeout_sec=GPS_FIX_TIMEOUT):
+    """Read a single GPS fix from an open port; return (lat, lon) or (0, 0) on failure."""
+    if ser is None or not ser.is_open:
+        return 0.0, 0.0
+
+    try:
+        # Discard sentences buffered since the last fix so we report a fresh one
+        ser.read(ser.in_waiting)
+        deadline = time.time() + timeout_sec
+        while time.time() < deadline:
+            line = ser.readline()
+            if not line.startswith(RMC_PREFIXES):
+                continue
+
+            parts = line.split(b",")
+            if len(parts) < 12 or parts[2] != b"A":
+                continue
+
+            lat = nmea_to_decimal(parts[3], parts[4])
+            lon = nmea_to_decimal(parts[5], parts[6])
+            if lat is not None and lon is not None:
+                return lat, lon
     except Exception as exc:
         print(f"[GPS] Error acquiring fix: {exc}")
+        # Closed so the main loop reopens the port, e.g. after the receiver is replugged
+        ser.close()
 
     return 0.0, 0.0
 
@@ -105,19 +158,34 @@ def main():
         print('RFM9x Error: ', error)
         sys.exit(-1)
 
+    gps = open_gps()
+    # A missing receiver is retried every GPS_REOPEN_INTERVAL and only the first
+    # failure is logged, so an unplugged GPS doesn't flood the journal
+    gps_open_failed = gps is None
+    gps_retry_at = time.monotonic() + GPS_REOPEN_INTERVAL
+
     display_text(display, "[CAR] Ready")
     print("[CAR] Ready")
     time.sleep(1)
 
     try:
-        # main loop
+        # main loop, scheduled against the monotonic clock so the time spent
+        # waiting for a fix or transmitting doesn't push every later cycle back
+        next_tick = time.monotonic()
+        overrunning = False
         while True:
             # TODO: collect:
             # - gps data
             # - obd data
             # - ocr tire gauge
 
-            lat, lon = fetch_gps_coordinates()
+            if (gps is None or not gps.is_open) and time.monotonic() >= gps_retry_at:
+                gps = open_gps(log_errors=not gps_open_failed)
+                if gps is not None and gps_open_failed:
+                    print(f"[GPS] Reopened {GPS_PORT}")
+                gps_open_failed = gps is None
+                gps_retry_at = time.monotonic() + GPS_REOPEN_INTERVAL
+            lat, lon = fetch_gps_coordinates(gps)
             print(f"[GPS] fix lat={lat}, lon={lon}")
 
             display_text(display, "[CAR] Transmitting...")
@@ -125,14 +193,26 @@ def main():
             payload = bytes("test\r\n","utf-8")
             rfm9x.send(payload)
 
-            time.sleep(1)
+            time.sleep(TX_HOLD)
 
             display_text(display, "[CAR] Ready")
 
-            time.sleep(1)
+            next_tick += TX_INTERVAL
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                overrunning = False
+                time.sleep(delay)
+            else:
+                # Logged once per run of overruns rather than every cycle
+                if not overrunning:
+                    print(f"[CAR] Cycle overran by {-delay:.2f}s, skipping ahead")
+                overrunning = True
+                next_tick = time.monotonic()
     except KeyboardInterrupt:
         print("[CAR] Shutdown requested by user, blanking display.")
     finally:
+        if gps is not None:
+            gps.close()
         blank_display(display)
 
 if __name__ == "__main__":
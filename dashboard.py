@@ -1,29 +1,128 @@
 import os
-import json
+import atexit
+import hashlib
 import logging
+import logging.handlers
 import queue
 import threading
-from flask import Flask, request, send_from_directory, Response, stream_with_context
+import orjson
+from flask import Flask, request, send_from_directory, Response
+
+# Debug mode (Werkzeug reloader/debugger and DEBUG-level logs) is opt-in: FLASK_DEBUG=1
+DEBUG = os.getenv("FLASK_DEBUG", "0") == "1"
 
 # Configure Flask to serve static files from React build
 app = Flask(__name__, static_folder='static', static_url_path='')
 
-# Set up logging for journald (level and function info only, journald handles timestamps/metadata)
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(levelname)s | %(name)s:%(funcName)s | %(message)s'
-)
+# Set up logging for journald (level and function info only, journald handles timestamps/metadata).
+# Request handlers only enqueue records; a background listener owns the stream
+# handler, so writing to stdout/journald never blocks a request.
+log_queue = queue.Queue(-1)
+console_handler = logging.StreamHandler()
+console_handler.setFormatter(logging.Formatter('%(levelname)s | %(name)s:%(funcName)s | %(message)s'))
+log_listener = logging.handlers.QueueListener(log_queue, console_handler)
+logging.getLogger().addHandler(logging.handlers.QueueHandler(log_queue))
+logging.getLogger().setLevel(logging.DEBUG if DEBUG else logging.INFO)
+log_listener.start()
+atexit.register(log_listener.stop)
 
 # Get logger for this module
 logger = logging.getLogger(__name__)
 
-# Thread-safe queue to store SSE client queues
-sse_clients = []
+# Set of per-client SSE queues, guarded by sse_lock
+sse_clients = set()
 sse_lock = threading.Lock()
 
+# Constant SSE frames, encoded once
+SSE_CONNECTED_MESSAGE = b"data: " + orjson.dumps({'type': 'connected', 'message': 'SSE connection established'}) + b"\n\n"
+SSE_KEEP_ALIVE = b": keep-alive\n\n"
+
+# Messages buffered per SSE client. A slow client loses its oldest messages
+# instead of being dropped, so it always catches up to the latest values.
+# Kept above 1 because gps and obd messages share the stream and must not
+# overwrite each other.
+SSE_CLIENT_QUEUE_SIZE = 10
+
+# Map tiles are static, so index them once at startup and let browsers cache them forever
+TILES_DIR = 'sonoma_raceway_tiles'
+TILE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# When running behind nginx, set TILES_ACCEL_PREFIX to an internal location
+# aliased to TILES_DIR (e.g. "/_tiles/") and nginx will send the tile bytes
+TILES_ACCEL_PREFIX = os.getenv("TILES_ACCEL_PREFIX")
+
+
+def index_tiles(tiles_dir):
+    """Return a frozenset of (z, x, y) for every tile under tiles_dir"""
+    tiles = set()
+    for root, _, files in os.walk(tiles_dir):
+        parts = os.path.relpath(root, tiles_dir).split(os.sep)
+        if len(parts) != 2 or not all(part.isdigit() for part in parts):
+            continue
+        z, x = int(parts[0]), int(parts[1])
+        for name in files:
+            stem, ext = os.path.splitext(name)
+            if ext == '.png' and stem.isdigit():
+                tiles.add((z, x, int(stem)))
+    return frozenset(tiles)
+
+
+AVAILABLE_TILES = index_tiles(TILES_DIR)
+
+
+def index_static_files(static_folder):
+    """Return a frozenset of the relative paths of every file in the React build"""
+    files = set()
+    for root, _, names in os.walk(static_folder):
+        rel_root = os.path.relpath(root, static_folder)
+        for name in names:
+            files.add(name if rel_root == '.' else f"{rel_root.replace(os.sep, '/')}/{name}")
+    return frozenset(files)
+
+
+def load_index_html(static_folder):
+    """Return (bytes, etag) of the built index.html, or (None, None) if the frontend isn't built"""
+    try:
+        with open(os.path.join(static_folder, 'index.html'), 'rb') as f:
+            html = f.read()
+    except FileNotFoundError:
+        return None, None
+    return html, hashlib.sha1(html).hexdigest()
+
+
+# Index the React build once at startup and keep index.html in memory for the
+# SPA fallback; restart the dashboard after rebuilding the frontend
+STATIC_FILES = index_static_files(app.static_folder)
+INDEX_HTML, INDEX_HTML_ETAG = load_index_html(app.static_folder)
+
+
+def put_latest(client_queue, message):
+    """Queue a message for a client, dropping its oldest message if it has fallen behind"""
+    try:
+        client_queue.put_nowait(message)
+    except queue.Full:
+        try:
+            client_queue.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            client_queue.put_nowait(message)
+        except queue.Full:
+            # Another broadcast refilled the queue first; this message is the one dropped
+            pass
+
+
+def has_type_field(data):
+    """Whether data (a dict, or a list of dicts) already carries a type field everywhere"""
+    if isinstance(data, dict):
+        return 'type' in data
+    if isinstance(data, list):
+        return all('type' in item for item in data if isinstance(item, dict))
+    return False
 
-def broadcast_data(data):
-    """Broadcast data to all connected SSE clients with type field added"""
+
+def add_type_field(data):
+    """Return a copy of data with a type field added where missing"""
     # Ensure data has a type field
     # If type is not present, infer it from the data structure
     if isinstance(data, dict):
@@ -53,27 +152,32 @@ def broadcast_data(data):
     else:
         # For non-dict, non-list data, wrap it
         data_with_type = {'type': 'obd', 'data': data}
+    return data_with_type
+
+
+def broadcast_data(raw_json):
+    """Broadcast an already-encoded JSON payload (bytes, no newlines) to all connected SSE clients"""
+    # Build the SSE frame once; it is written to every client as-is
+    message = b"data: " + raw_json + b"\n\n"
     
-    data_json = json.dumps(data_with_type)
-    message = f"data: {data_json}\n\n"
-    
+    # Snapshot the clients so the lock isn't held while queueing messages
     with sse_lock:
-        # Remove disconnected clients
-        disconnected_clients = []
-        for i, client_queue in enumerate(sse_clients):
-            try:
-                client_queue.put_nowait(message)
-            except queue.Full:
-                disconnected_clients.append(i)
-            except Exception as e:
-                logger.warning(f"Error sending to SSE client: {e}")
-                disconnected_clients.append(i)
-        
-        # Remove disconnected clients (iterate in reverse to maintain indices)
-        for i in reversed(disconnected_clients):
-            sse_clients.pop(i)
+        clients = tuple(sse_clients)
+    
+    disconnected_clients = []
+    for client_queue in clients:
+        try:
+            put_latest(client_queue, message)
+        except Exception as e:
+            logger.warning("Error sending to SSE client: %s", e)
+            disconnected_clients.append(client_queue)
+    
+    # Remove disconnected clients
+    if disconnected_clients:
+        with sse_lock:
+            sse_clients.difference_update(disconnected_clients)
     
-    logger.info(f"Broadcasted data to {len(sse_clients)} SSE client(s)")
+    logger.info("Broadcasted data to %d SSE client(s)", len(sse_clients))
 
 
 @app.route("/events")
@@ -81,17 +185,17 @@ def stream_events():
     """Server-Sent Events endpoint for real-time data streaming"""
     def event_stream():
         # Create a queue for this client
-        client_queue = queue.Queue(maxsize=100)
+        client_queue = queue.Queue(maxsize=SSE_CLIENT_QUEUE_SIZE)
         
-        # Add client to the list
+        # Add client to the set
         with sse_lock:
-            sse_clients.append(client_queue)
+            sse_clients.add(client_queue)
         
-        logger.info(f"SSE client connected. Total clients: {len(sse_clients)}")
+        logger.info("SSE client connected. Total clients: %d", len(sse_clients))
         
         try:
             # Send initial connection message
-            yield f"data: {json.dumps({'type': 'connected', 'message': 'SSE connection established'})}\n\n"
+            yield SSE_CONNECTED_MESSAGE
             
             # Keep connection alive and send messages
             while True:
@@ -101,18 +205,17 @@ def stream_events():
                     yield message
                 except queue.Empty:
                     # Send keep-alive comment
-                    yield ": keep-alive\n\n"
+                    yield SSE_KEEP_ALIVE
         except GeneratorExit:
             logger.info("SSE client disconnected")
         finally:
-            # Remove client from the list
+            # Remove client from the set
             with sse_lock:
-                if client_queue in sse_clients:
-                    sse_clients.remove(client_queue)
-            logger.info(f"SSE client removed. Total clients: {len(sse_clients)}")
+                sse_clients.discard(client_queue)
+            logger.info("SSE client removed. Total clients: %d", len(sse_clients))
     
     return Response(
-        stream_with_context(event_stream()),
+        event_stream(),
         mimetype='text/event-stream',
         headers={
             'Cache-Control': 'no-cache',
@@ -125,7 +228,9 @@ def stream_events():
 @app.route("/data", methods=["POST"])
 def receive_data():
     try:
-        data = request.get_json()
+        # Read the body once; nothing else needs Flask's cached copy
+        raw = request.get_data(cache=False)
+        data = orjson.loads(raw) if raw else None
         if data is None:
             logger.warning(
                 "Received POST request with no JSON data",
@@ -133,52 +238,70 @@ def receive_data():
             )
             return {"error": "No JSON data provided"}, 400
         
+        data_size = len(raw)
         logger.info(
-            f"Received data: {json.dumps(data, indent=2)}",
-            extra={"client_ip": request.remote_addr, "data_size": len(json.dumps(data))}
+            "Received %d bytes from %s", data_size, request.remote_addr,
+            extra={"client_ip": request.remote_addr, "data_size": data_size}
         )
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Received data: %s", orjson.dumps(data, option=orjson.OPT_INDENT_2).decode())
         
-        # Broadcast data to all connected SSE clients
-        broadcast_data(data)
+        # Broadcast data to all connected SSE clients. The body is forwarded
+        # as received unless it needs a type field added, or contains line
+        # breaks that would split the SSE data line.
+        if not has_type_field(data) or b"\n" in raw or b"\r" in raw:
+            raw = orjson.dumps(add_type_field(data))
+        broadcast_data(raw)
         
         return {"status": "success", "message": "Data received"}, 200
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         logger.error(
-            f"JSON decode error: {str(e)}",
+            "JSON decode error: %s", e,
             extra={"client_ip": request.remote_addr, "error_type": "JSONDecodeError"},
             exc_info=True
         )
         return {"error": "Invalid JSON format"}, 400
     except Exception as e:
         logger.error(
-            f"Error processing data: {str(e)}",
+            "Error processing data: %s", e,
             extra={"client_ip": request.remote_addr, "error_type": type(e).__name__},
             exc_info=True
         )
         return {"error": "Internal server error"}, 500
 
 
+def index_html_response():
+    """Serve the in-memory index.html, answering 304 when the client's copy is current"""
+    response = Response(INDEX_HTML, mimetype='text/html')
+    response.set_etag(INDEX_HTML_ETAG)
+    return response.make_conditional(request)
+
+
 @app.route("/")
 def serve_frontend():
     """Serve the React frontend index.html"""
-    if not os.path.exists(os.path.join(app.static_folder, 'index.html')):
+    if INDEX_HTML is None:
         return {
             "error": "Frontend not built",
             "message": "Please run './build_frontend.sh' to build the React frontend"
         }, 503
-    return send_from_directory(app.static_folder, 'index.html')
+    return index_html_response()
 
 
 @app.route("/tiles/<int:z>/<int:x>/<int:y>.png")
 def serve_tile(z, x, y):
     """Serve map tiles from sonoma_raceway_tiles directory"""
-    tile_path = os.path.join('sonoma_raceway_tiles', str(z), str(x), f'{y}.png')
+    if (z, x, y) not in AVAILABLE_TILES:
+        logger.debug("Tile not found: %d/%d/%d.png", z, x, y)
+        return {"error": "Tile not found"}, 404
     
-    if os.path.exists(tile_path) and os.path.isfile(tile_path):
-        return send_from_directory('sonoma_raceway_tiles', f'{z}/{x}/{y}.png', mimetype='image/png')
+    if TILES_ACCEL_PREFIX:
+        response = Response(mimetype='image/png')
+        response.headers['X-Accel-Redirect'] = f"{TILES_ACCEL_PREFIX.rstrip('/')}/{z}/{x}/{y}.png"
     else:
-        logger.debug(f"Tile not found: {tile_path}")
-        return {"error": "Tile not found"}, 404
+        response = send_from_directory(TILES_DIR, f'{z}/{x}/{y}.png', mimetype='image/png')
+    response.headers['Cache-Control'] = TILE_CACHE_CONTROL
+    return response
 
 
 @app.route("/<path:path>")
@@ -193,21 +316,22 @@ def serve_static(path):
         return {"error": "Not found"}, 404
     
     # Try to serve the file, fallback to index.html for client-side routing
-    file_path = os.path.join(app.static_folder, path)
-    if os.path.exists(file_path) and os.path.isfile(file_path):
+    if path in STATIC_FILES:
         return send_from_directory(app.static_folder, path)
     else:
         # Fallback to index.html for client-side routing
-        if os.path.exists(os.path.join(app.static_folder, 'index.html')):
-            return send_from_directory(app.static_folder, 'index.html')
+        if INDEX_HTML is not None:
+            return index_html_response()
         return {"error": "Frontend not built"}, 503
 
 
 def main():
     logger.info("Starting GROUND STATION logic...")
     port = int(os.getenv("PORT", 5000))
-    logger.info(f"Starting Flask web server on port {port}...")
-    app.run(host="0.0.0.0", port=port, debug=True)
+    logger.info("Starting Flask web server on port %d...", port)
+    # Development server only; in production the dashboard is served by
+    # gunicorn with gevent workers (see wsgi.py)
+    app.run(host="0.0.0.0", port=port, debug=DEBUG)
 
 
 if __name__ == "__main__":
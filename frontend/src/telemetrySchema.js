@@ -12,6 +12,7 @@ export const telemetryDataSchema = z.object({
   throttle: z.number().optional(),
   engine_load: z.number().optional(),
   fuel_level: z.number().optional(),
+  vin: z.string().optional(),
 }).passthrough() // Allow additional fields that aren't in the schema
 
 /**
@@ -53,7 +54,7 @@ export function validateTelemetryData(data) {
   
   if (result.success) {
     // Check for any unexpected fields (excluding timestamp which we add)
-    const expectedFields = ['type', 'speed', 'rpm', 'coolant_temp', 'throttle', 'engine_load', 'fuel_level', 'timestamp']
+    const expectedFields = ['type', 'speed', 'rpm', 'coolant_temp', 'throttle', 'engine_load', 'fuel_level', 'vin', 'timestamp']
     const dataFields = Object.keys(data)
     const unexpectedFields = dataFields.filter(field => !expectedFields.includes(field))
     
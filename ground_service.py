@@ -1,13 +1,75 @@
 import time
 import sys
+import threading
 import busio
 import board
 from digitalio import DigitalInOut, Direction, Pull
 import adafruit_ssd1306
 import adafruit_rfm9x
+import RPi.GPIO as GPIO
+
+# BCM pin wired to the RFM9x DIO0 line, which goes high on RxDone while listening
+DIO0_PIN = 22
+
+# RFM9x registers used by FastRFM9x; 0x10-0x13 are contiguous so one burst
+# read returns the FIFO start address, IRQ flags and payload length together
+_REG_FIFO = 0x00
+_REG_FIFO_ADDR_PTR = 0x0D
+_REG_FIFO_RX_CURRENT_ADDR = 0x10
+_REG_IRQ_FLAGS = 0x12
+_IRQ_RX_DONE = 0x40
+_IRQ_PAYLOAD_CRC_ERROR = 0x20
+_HEADER_LENGTH = 4
+_BROADCAST_ADDRESS = 0xFF
+
+class FastRFM9x(adafruit_rfm9x.RFM9x):
+    """RFM9x that can drain a received packet in as few SPI transactions as possible.
+
+    read_pending_packet() is meant to be called once DIO0 has signalled RxDone,
+    so unlike receive() it never waits: if no packet is ready it returns None.
+    The inherited receive() is left untouched for send_with_ack() and friends.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._rx_status = bytearray(4)
+
+    def read_pending_packet(self, *, keep_listening=True, with_header=False):
+        status = self._rx_status
+        self._read_into(_REG_FIFO_RX_CURRENT_ADDR, status)
+        current_addr, irq_flags, length = status[0], status[2], status[3]
+        if not irq_flags & _IRQ_RX_DONE:
+            return None
+
+        packet = None
+        if not (self.enable_crc and irq_flags & _IRQ_PAYLOAD_CRC_ERROR) and length > _HEADER_LENGTH:
+            self._write_u8(_REG_FIFO_ADDR_PTR, current_addr)
+            packet = bytearray(length)
+            self._read_into(_REG_FIFO, packet)
+            self.last_rssi = self.rssi
+            self.last_snr = self.snr
+
+        # Clear all interrupt flags; the radio is still in continuous RX
+        self._write_u8(_REG_IRQ_FLAGS, 0xFF)
+        if not keep_listening:
+            self.idle()
+
+        if packet is None:
+            return None
+        if (self.node != _BROADCAST_ADDRESS
+                and packet[0] != _BROADCAST_ADDRESS
+                and packet[0] != self.node):
+            return None
+        return packet if with_header else packet[_HEADER_LENGTH:]
 
 def display_text(display, text):
-    display.fill(0)
+    # Skip the I2C framebuffer transfer when the text on screen is unchanged
+    if text == display._last_text:
+        return
+    display._last_text = text
+
+    # Only the first text row is ever drawn, so clear just that row
+    display.fill_rect(0, 0, display.width, 8, 0)
     display.text(text, 0, 0, 1)
     display.show()
 
@@ -18,10 +80,12 @@ def main():
     # 128x32 OLED Display
     reset_pin = DigitalInOut(board.D4)
     display = adafruit_ssd1306.SSD1306_I2C(128, 32, i2c, reset=reset_pin)
+    display._last_text = None
     
     # Clear the display.
     width = display.width
     height = display.height
+    display.fill(0)
 
     display_text(display, "[GROUND] Starting...")
     print("[GROUND] Starting...")
@@ -34,7 +98,7 @@ def main():
 
     # Attempt to set up the RFM9x Module
     try:
-        rfm9x = adafruit_rfm9x.RFM9x(spi, CS, RESET, 915.0)
+        rfm9x = FastRFM9x(spi, CS, RESET, 915.0)
         rfm9x.tx_power = 20 # max is 23 but module can overheat
 
         display_text(display, "[GROUND] RFM9x: Detected")
@@ -50,22 +114,39 @@ def main():
     print("[GROUND] Ready")
     time.sleep(1)
 
-    # main loop
-    while True:
-        display_text(display, "[GROUND] Listening...")
+    # Wake up on the radio's RxDone interrupt instead of polling it over SPI
+    rx_ready = threading.Event()
+    GPIO.setmode(GPIO.BCM)
+    GPIO.setup(DIO0_PIN, GPIO.IN, pull_up_down=GPIO.PUD_DOWN)
+    GPIO.add_event_detect(DIO0_PIN, GPIO.RISING, callback=lambda channel: rx_ready.set())
+    rfm9x.listen()
+
+    display_text(display, "[GROUND] Listening...")
+
+    try:
+        # main loop
+        while True:
+            # The timeout only guards against an edge missed before the
+            # callback was registered; packets normally arrive via the event
+            if not rx_ready.wait(timeout=1.0) and not rfm9x.rx_done():
+                continue
+            rx_ready.clear()
 
-        packet = rfm9x.receive()
-        if packet is not None:
-            message = packet.decode("utf-8")
-            print(message)
+            # RxDone is already set, so this drains the FIFO without waiting
+            # and leaves the radio listening
+            packet = rfm9x.read_pending_packet(keep_listening=True)
+            if packet is not None:
+                message = packet.decode("utf-8")
+                print(message)
 
-            # here we can crack the packet open then forward to
-            # the webserver with the requests module.
+                # here we can crack the packet open then forward to
+                # the webserver with the requests module.
 
-            display_text(display, "[GROUND] Received!")
-            time.sleep(0.5)
-        else:
-            time.sleep(0.1)
+                display_text(display, "[GROUND] Received!")
+                time.sleep(0.5)
+                display_text(display, "[GROUND] Listening...")
+    finally:
+        GPIO.cleanup(DIO0_PIN)
 
 if __name__ == "__main__":
     main()
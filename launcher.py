@@ -1,15 +1,20 @@
-import pathlib
+import os
 import sys
 
-ROLE_FILE = pathlib.Path("/boot/pi_role")
+ROLE_FILE = "/boot/pi_role"
 
 
 def get_role() -> str:
+    # A missing file surfaces as ENOENT from open, so no separate exists() check
     try:
-        role = ROLE_FILE.read_text().strip().lower()
+        fd = os.open(ROLE_FILE, os.O_RDONLY)
     except FileNotFoundError:
-        role = "unknown"
-    return role
+        return "unknown"
+    try:
+        data = os.read(fd, 64)
+    finally:
+        os.close(fd)
+    return data.decode("utf-8", errors="ignore").strip().lower()
 
 
 def main():
@@ -1,8 +1,14 @@
 import time
 import os
 import pathlib
+import subprocess
+import queue
+import threading
 import obd
+import orjson
 import requests
+import serial
+from requests.adapters import HTTPAdapter
 from typing import Optional
 
 # Default connection - will auto-detect port or use obdsim if available
@@ -16,6 +22,86 @@ LOG_TO_TERMINAL = os.getenv("CAR_LOG_TO_TERMINAL", "0").lower() in ("1", "true",
 # Ground station server URL - uses PORT env var or defaults to port 5000
 GROUND_STATION_URL = os.getenv("GROUND_STATION_URL") or f"http://localhost:{os.getenv('PORT', '5000')}"
 
+# Reuse one keep-alive connection to the ground station instead of opening
+# a new TCP connection for every sample
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+SESSION.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+SESSION.headers["Connection"] = "keep-alive"
+SESSION.headers["Content-Type"] = "application/json"
+
+# Samples buffered between the OBD reader and the ground station sender
+SEND_QUEUE_SIZE = 10
+
+# Seconds between the start of consecutive OBD reads
+READ_INTERVAL = 1.0
+
+# ELM327 response timing applied after connecting:
+#   ATAT2 - aggressive adaptive timing, return as soon as the ECU stops answering
+#   ATST  - cap on the response wait in 4 ms units (0x20 = 128 ms, ELM default is ~200 ms)
+ELM_TIMING_COMMANDS = (b"ATAT2", b"ATST20")
+
+
+def tune_elm_timing(connection: obd.OBD) -> None:
+    """
+    Shorten the ELM327 response timeout so queries return as soon as the
+    expected bytes arrive, and enable python-OBD's fast mode which reuses
+    learned response frame counts.
+    
+    Args:
+        connection: Connected OBD connection object
+    """
+    for cmd in ELM_TIMING_COMMANDS:
+        # python-OBD has no public API for raw AT commands
+        lines = connection.interface._ELM327__send(cmd)
+        if "OK" not in lines:
+            print(f"[OBD] Adapter rejected {cmd.decode()}: {lines}")
+    connection.fast = True
+
+
+def _is_virtual_port(port: str) -> bool:
+    """Whether the port is a pseudo-terminal created by obdsim."""
+    return "ttys" in port or "pts" in port
+
+
+def _wait_for_port(port: str, timeout: float = 1.0) -> bool:
+    """
+    Poll until the serial port can be opened, instead of sleeping blindly
+    while obdsim brings up its virtual port.
+    
+    Returns:
+        True if the port opened within the timeout
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            serial.Serial(port).close()
+            return True
+        except serial.SerialException:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.1)
+
+
+def _tune_serial_latency(port: str) -> None:
+    """
+    Drop the USB-serial latency timer from the 16 ms kernel default to 1 ms,
+    so short ELM327 replies are handed to us as soon as they arrive.
+    Best effort: needs write access to sysfs, otherwise falls back to setserial.
+    """
+    tty = os.path.basename(os.path.realpath(port))
+    try:
+        with open(f"/sys/bus/usb-serial/devices/{tty}/latency_timer", "w") as f:
+            f.write("1")
+        return
+    except OSError:
+        pass
+
+    try:
+        subprocess.run(["setserial", port, "low_latency"], check=True, capture_output=True)
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"[OBD] Could not set low latency on {port}: {e}")
+
 
 def connect_obd(port: Optional[str] = None, baudrate: Optional[int] = None) -> Optional[obd.OBD]:
     """
@@ -38,10 +124,12 @@ def connect_obd(port: Optional[str] = None, baudrate: Optional[int] = None) -> O
         
         print(f"[OBD] Attempting to connect to {port}...")
         
-        # Give obdsim a moment to initialize if it's a virtual port
-        if "ttys" in port or "pts" in port:
-            print("[OBD] Waiting for obdsim to initialize...")
-            time.sleep(1)
+        if _is_virtual_port(port):
+            # Give obdsim a moment to initialize if its port isn't ready yet
+            if not _wait_for_port(port):
+                print("[OBD] Virtual port not ready yet, trying anyway...")
+        else:
+            _tune_serial_latency(port)
         
         # Try different baudrates if specified, otherwise use defaults
         baudrates_to_try = [baudrate] if baudrate else [38400, 9600, 115200]
@@ -49,10 +137,12 @@ def connect_obd(port: Optional[str] = None, baudrate: Optional[int] = None) -> O
         for baud in baudrates_to_try:
             try:
                 print(f"[OBD] Trying baudrate {baud}...")
-                # Try with fast=False first (more compatible with obdsim)
+                # Connect with fast=False (more compatible with obdsim);
+                # fast mode is enabled once the adapter is verified
                 connection = obd.OBD(port, baudrate=baud, fast=False, timeout=3)
                 
                 if connection.is_connected():
+                    tune_elm_timing(connection)
                     print(f"[OBD] Connected successfully at {baud} baud!")
                     print(f"[OBD] Protocol: {connection.protocol_name()}")
                     print(f"[OBD] Supported commands: {len(connection.supported_commands)}")
@@ -70,6 +160,9 @@ def connect_obd(port: Optional[str] = None, baudrate: Optional[int] = None) -> O
         try:
             connection = obd.OBD()  # Auto-detect port
             if connection.is_connected():
+                if not _is_virtual_port(connection.port_name()):
+                    _tune_serial_latency(connection.port_name())
+                tune_elm_timing(connection)
                 print(f"[OBD] Connected successfully!")
                 print(f"[OBD] Protocol: {connection.protocol_name()}")
                 print(f"[OBD] Supported commands: {len(connection.supported_commands)}")
@@ -82,6 +175,102 @@ def connect_obd(port: Optional[str] = None, baudrate: Optional[int] = None) -> O
             return None
 
 
+# Mode 01 PIDs read every cycle: PID -> (data key, payload bytes, SAE J1979 decoder)
+OBD_PIDS = {
+    0x0D: ('speed', 1, lambda d: d[0]),                          # km/h
+    0x0C: ('rpm', 2, lambda d: (d[0] * 256 + d[1]) / 4.0),       # rpm
+    0x05: ('coolant_temp', 1, lambda d: d[0] - 40),              # °C
+    0x11: ('throttle', 1, lambda d: d[0] * 100.0 / 255.0),       # %
+    0x04: ('engine_load', 1, lambda d: d[0] * 100.0 / 255.0),    # %
+    0x2F: ('fuel_level', 1, lambda d: d[0] * 100.0 / 255.0),     # %
+}
+
+
+def _decode_multi_pid(messages) -> dict:
+    """
+    Decode a batched mode 01 response into a dictionary of OBD data.
+
+    The response data is the 0x41 mode byte followed by repeated
+    (PID, payload) groups in the order the ECU chose to answer them.
+    Decoding stops at the first PID we did not ask for, since its payload
+    length is unknown.
+    """
+    data = {}
+    for message in messages:
+        d = message.data
+        i = 1  # skip the 0x41 mode byte
+        while i < len(d):
+            entry = OBD_PIDS.get(d[i])
+            if entry is None or i + 1 + entry[1] > len(d):
+                break
+            key, n, decode = entry
+            data[key] = decode(d[i + 1:i + 1 + n])
+            i += 1 + n
+    return data
+
+
+def build_multi_pid_command(pids) -> Optional[obd.OBDCommand]:
+    """
+    Build a single mode 01 request for all the given PIDs (e.g. "010D0C0511042F").
+    The ECU answers every PID in one response instead of paying one ELM
+    round-trip per PID. A mode 01 request may carry at most 6 PIDs.
+    """
+    if not pids:
+        return None
+    return obd.OBDCommand(
+        "MULTI_PID",
+        "Batched mode 01 PIDs",
+        b"01" + b"".join(b"%02X" % pid for pid in pids),
+        0,  # variable length, don't let python-OBD pad or trim the response
+        _decode_multi_pid,
+        obd.ECU.ENGINE,
+        True,
+    )
+
+
+def build_pid_commands(pids) -> tuple:
+    """Resolve (data key, OBDCommand) pairs once for the one-query-per-PID fallback."""
+    return tuple((OBD_PIDS[pid][0], obd.commands[1][pid]) for pid in pids)
+
+
+# PIDs actually queried, narrowed to what the vehicle supports by load_vehicle_info()
+SUPPORTED_PIDS = tuple(OBD_PIDS)
+OBD_MULTI_PID = build_multi_pid_command(SUPPORTED_PIDS)
+OBD_PID_COMMANDS = build_pid_commands(SUPPORTED_PIDS)
+
+# Vehicle Identification Number, read once per session (None if unsupported)
+VEHICLE_VIN = None
+
+# Batched requests are abandoned after this many consecutive replies that
+# miss PIDs (non-CAN protocols and some simulators only answer the first PID)
+MULTI_PID_MAX_FAILURES = 3
+_multi_pid_failures = 0
+
+
+def load_vehicle_info(connection: obd.OBD) -> None:
+    """
+    Drop PIDs the vehicle doesn't support, so they never cost a round-trip
+    answered with NO DATA, and read the VIN once for the whole session.
+    
+    Args:
+        connection: Connected OBD connection object
+    """
+    global SUPPORTED_PIDS, OBD_MULTI_PID, OBD_PID_COMMANDS, VEHICLE_VIN
+
+    SUPPORTED_PIDS = tuple(pid for pid in OBD_PIDS if connection.supports(obd.commands[1][pid]))
+    OBD_MULTI_PID = build_multi_pid_command(SUPPORTED_PIDS)
+    OBD_PID_COMMANDS = build_pid_commands(SUPPORTED_PIDS)
+    unsupported = [OBD_PIDS[pid][0] for pid in OBD_PIDS if pid not in SUPPORTED_PIDS]
+    if unsupported:
+        print(f"[OBD] Not supported by vehicle, skipping: {', '.join(unsupported)}")
+
+    if connection.supports(obd.commands.VIN):
+        response = connection.query(obd.commands.VIN)
+        if response.value is not None:
+            VEHICLE_VIN = response.value.decode("ascii", errors="ignore")
+            print(f"[OBD] VIN: {VEHICLE_VIN}")
+
+
 def read_obd_data(connection: obd.OBD) -> dict:
     """
     Read common OBD-II data from the connection.
@@ -92,47 +281,100 @@ def read_obd_data(connection: obd.OBD) -> dict:
     Returns:
         Dictionary of OBD data
     """
+    global _multi_pid_failures
+
     data = {}
+    if _multi_pid_failures < MULTI_PID_MAX_FAILURES and OBD_MULTI_PID is not None:
+        response = connection.query(OBD_MULTI_PID, force=True)
+        data = response.value or {}
+        if len(data) == len(OBD_PID_COMMANDS):
+            _multi_pid_failures = 0
+        else:
+            _multi_pid_failures += 1
+            if _multi_pid_failures == MULTI_PID_MAX_FAILURES:
+                print("[OBD] Batched PID request keeps missing PIDs, falling back to one query per PID")
+
+    # Query individually whatever the batched request didn't answer
+    # (every PID once batching has been abandoned)
+    for key, cmd in OBD_PID_COMMANDS:
+        if key in data:
+            continue
+        value = connection.query(cmd).value
+        if value is not None:
+            data[key] = value.magnitude
     
-    # Speed (km/h)
-    cmd = obd.commands.SPEED
-    response = connection.query(cmd)
-    if response.value is not None:
-        data['speed'] = response.value.magnitude
-    
-    # RPM
-    cmd = obd.commands.RPM
-    response = connection.query(cmd)
-    if response.value is not None:
-        data['rpm'] = response.value.magnitude
-    
-    # Engine coolant temperature (°C)
-    cmd = obd.commands.COOLANT_TEMP
-    response = connection.query(cmd)
-    if response.value is not None:
-        data['coolant_temp'] = response.value.magnitude
-    
-    # Throttle position (%)
-    cmd = obd.commands.THROTTLE_POS
-    response = connection.query(cmd)
-    if response.value is not None:
-        data['throttle'] = response.value.magnitude
-    
-    # Engine load (%)
-    cmd = obd.commands.ENGINE_LOAD
-    response = connection.query(cmd)
-    if response.value is not None:
-        data['engine_load'] = response.value.magnitude
-    
-    # Fuel level (%)
-    cmd = obd.commands.FUEL_LEVEL
-    response = connection.query(cmd)
-    if response.value is not None:
-        data['fuel_level'] = response.value.magnitude
+    if data:
+        # Tagged here so the ground station can forward the payload without re-encoding it
+        data['type'] = 'obd'
+        if VEHICLE_VIN is not None:
+            data['vin'] = VEHICLE_VIN
     
     return data
 
 
+def obd_reader(connection: obd.OBD, send_queue: queue.Queue, stop_event: threading.Event) -> None:
+    """
+    Read OBD data every second and queue it for the sender thread.
+    If the queue is full the oldest sample is dropped, so the ground station
+    always receives the most recent data once it catches up.
+    
+    Reads are scheduled against the monotonic clock, so the time spent
+    querying doesn't accumulate as drift; a read that overruns its slot
+    skips ahead rather than bursting to catch up.
+    """
+    next_tick = time.monotonic()
+    while not stop_event.is_set():
+        data = read_obd_data(connection)
+        if data:
+            # Conditionally print to terminal based on env var
+            if LOG_TO_TERMINAL:
+                print(f"[CAR] OBD Data: {data}")
+            
+            try:
+                send_queue.put_nowait(data)
+            except queue.Full:
+                try:
+                    send_queue.get_nowait()
+                except queue.Empty:
+                    pass
+                send_queue.put_nowait(data)
+                if LOG_TO_TERMINAL:
+                    print("[CAR] Send queue full, dropped oldest sample")
+        else:
+            if LOG_TO_TERMINAL:
+                print("[CAR] No OBD data received")
+        
+        next_tick += READ_INTERVAL
+        delay = next_tick - time.monotonic()
+        if delay < 0:
+            if LOG_TO_TERMINAL:
+                print(f"[CAR] OBD read overran by {-delay:.2f}s, skipping ahead")
+            next_tick = time.monotonic()
+            delay = 0
+        stop_event.wait(delay)
+
+
+def ground_sender(send_queue: queue.Queue, stop_event: threading.Event) -> None:
+    """Post queued OBD samples to the ground station until stopped."""
+    while not stop_event.is_set():
+        try:
+            data = send_queue.get(timeout=0.5)
+        except queue.Empty:
+            continue
+        
+        try:
+            response = SESSION.post(
+                f"{GROUND_STATION_URL}/data",
+                data=orjson.dumps(data),
+                timeout=2
+            )
+            if LOG_TO_TERMINAL:
+                print(f"[CAR] Ground station response: {response.status_code}")
+        except requests.exceptions.RequestException as e:
+            if LOG_TO_TERMINAL:
+                print(f"[CAR] Failed to send data to ground station: {e}")
+
+
 def main():
     print("Starting CAR node logic...")
     
@@ -147,39 +389,29 @@ def main():
         print("      To use obdsim, see OBD_SIM.md for setup instructions.")
     else:
         print("[CAR] OBD connection established. Reading data...")
+        load_vehicle_info(obd_conn)
+        
+        # Read OBD data and send it to the ground station on separate threads,
+        # so a slow or unreachable ground station never delays the next read
+        send_queue = queue.Queue(maxsize=SEND_QUEUE_SIZE)
+        stop_event = threading.Event()
+        reader = threading.Thread(target=obd_reader, args=(obd_conn, send_queue, stop_event), daemon=True)
+        sender = threading.Thread(target=ground_sender, args=(send_queue, stop_event), daemon=True)
+        reader.start()
+        sender.start()
         
-        # Main loop - read OBD data periodically
         try:
-            while True:
-                data = read_obd_data(obd_conn)
-                if data:
-                    # Conditionally print to terminal based on env var
-                    if LOG_TO_TERMINAL:
-                        print(f"[CAR] OBD Data: {data}")
-                    
-                    # Send data to ground station
-                    try:
-                        response = requests.post(
-                            f"{GROUND_STATION_URL}/data",
-                            json=data,
-                            timeout=2
-                        )
-                        if LOG_TO_TERMINAL:
-                            print(f"[CAR] Ground station response: {response.status_code}")
-                    except requests.exceptions.RequestException as e:
-                        if LOG_TO_TERMINAL:
-                            print(f"[CAR] Failed to send data to ground station: {e}")
-                else:
-                    if LOG_TO_TERMINAL:
-                        print("[CAR] No OBD data received")
-                
-                time.sleep(1)  # Read every second
+            while reader.is_alive():
+                reader.join(timeout=0.5)
         except KeyboardInterrupt:
             print("\n[CAR] Shutting down...")
         finally:
+            stop_event.set()
+            reader.join()
+            sender.join()
             obd_conn.close()
+            SESSION.close()
             print("[CAR] OBD connection closed")
 
-
 if __name__ == "__main__":
     main()
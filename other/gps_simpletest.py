@@ -7,39 +7,71 @@ import time
 #   - Sometimes /dev/ttyUSB0
 PORT = "/dev/ttyUSB0"
 BAUD = 9600  # default for the Ultimate GPS
+MINUTES_TO_DEGREES = 1.0 / 60.0
 
 def nmea_to_decimal(coord_str, direction):
     """
     Convert NMEA coordinate format (ddmm.mmmm or dddmm.mmmm) to decimal degrees.
-    coord_str: string like '3407.1234' (lat) or '11823.4567' (lon)
-    direction: 'N','S','E','W'
+    coord_str: bytes like b'3407.1234' (lat) or b'11823.4567' (lon)
+    direction: b'N', b'S', b'E', b'W'
     """
     if not coord_str or not direction:
         return None
 
-    # Latitude has 2-degree digits, longitude has 3-degree digits
     if len(coord_str) < 4:
         return None
 
-    if direction in ("N", "S"):
-        deg_len = 2
-    else:
-        deg_len = 3
-
+    # ddmm.mmmm is degrees * 100 + minutes, so one float parse and a divmod
+    # split it without slicing on the 2 (lat) or 3 (lon) degree digits
     try:
-        degrees = int(coord_str[:deg_len])
-        minutes = float(coord_str[deg_len:])
+        degrees, minutes = divmod(float(coord_str), 100.0)
     except ValueError:
         return None
 
-    decimal = degrees + minutes / 60.0
+    decimal = degrees + minutes * MINUTES_TO_DEGREES
 
-    if direction in ("S", "W"):
+    if direction in (b"S", b"W"):
         decimal = -decimal
 
     return decimal
 
 
+def handle_sentence(line):
+    """Print the fix from an RMC sentence; other sentences are ignored."""
+    # Print raw NMEA if you want to debug:
+    # print(line)
+
+    # Look for RMC (Recommended Minimum) sentences
+    if not line.startswith((b"$GPRMC", b"$GNRMC")):
+        return
+
+    parts = line.split(b",")
+    if len(parts) < 12:
+        return
+
+    status = parts[2]  # b'A' = valid, b'V' = void
+    if status != b"A":
+        print("No valid fix yet...")
+        return
+
+    raw_lat = parts[3]
+    lat_dir = parts[4]
+    raw_lon = parts[5]
+    lon_dir = parts[6]
+
+    lat = nmea_to_decimal(raw_lat, lat_dir)
+    lon = nmea_to_decimal(raw_lon, lon_dir)
+    if lat is None or lon is None:
+        return
+
+    # UTC time and date, decoded only because they are printed
+    utc_time = parts[1].decode("ascii", errors="ignore")  # hhmmss.sss
+    utc_date = parts[9].decode("ascii", errors="ignore")  # ddmmyy
+
+    print(f"Fix: lat={lat:.6f}, lon={lon:.6f}, "
+          f"UTC time={utc_time}, date={utc_date}")
+
+
 def main():
     print(f"Opening {PORT} at {BAUD} baud...")
     with serial.Serial(PORT, BAUD, timeout=1) as ser:
@@ -47,46 +79,24 @@ def main():
         time.sleep(2)
 
         print("Reading NMEA sentences. Press Ctrl+C to stop.\n")
+        buf = bytearray()
         while True:
             try:
-                line = ser.readline().decode("ascii", errors="ignore").strip()
-                if not line:
-                    continue
-
-                # Print raw NMEA if you want to debug:
-                # print(line)
-
-                # Look for RMC (Recommended Minimum) sentences
-                if line.startswith("$GPRMC") or line.startswith("$GNRMC"):
-                    parts = line.split(",")
-                    if len(parts) < 12:
-                        continue
-
-                    status = parts[2]  # 'A' = valid, 'V' = void
-                    if status != "A":
-                        print("No valid fix yet...")
-                        continue
-
-                    raw_lat = parts[3]
-                    lat_dir = parts[4]
-                    raw_lon = parts[5]
-                    lon_dir = parts[6]
-
-                    lat = nmea_to_decimal(raw_lat, lat_dir)
-                    lon = nmea_to_decimal(raw_lon, lon_dir)
-
-                    # UTC time and date
-                    utc_time = parts[1]  # hhmmss.sss
-                    utc_date = parts[9]  # ddmmyy
+                # Block for at most one byte when idle, otherwise drain
+                # everything the driver has buffered in a single read
+                buf.extend(ser.read(ser.in_waiting or 1))
 
-                    print(f"Fix: lat={lat:.6f}, lon={lon:.6f}, "
-                          f"UTC time={utc_time}, date={utc_date}")
+                while (i := buf.find(b"\n")) >= 0:
+                    line = bytes(buf[:i]).strip()
+                    del buf[:i + 1]
+                    handle_sentence(line)
 
             except KeyboardInterrupt:
                 print("\nStopping.")
                 break
             except Exception as e:
                 print(f"Error: {e}")
+                buf.clear()
                 time.sleep(1)
 
 
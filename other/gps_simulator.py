@@ -1,11 +1,13 @@
 import time
 import os
-import json
 import pathlib
-import math
-import requests
-from typing import Optional, List, Tuple
-from datetime import datetime
+import ijson
+import numpy as np
+import orjson
+import urllib3
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterator, Optional, Tuple
 
 # Default route file - can be overridden via GPS_ROUTE_FILE environment variable
 # If not specified, will use the first .json file found in sim_gps_routes directory
@@ -21,62 +23,101 @@ GROUND_STATION_URL = os.getenv("GROUND_STATION_URL") or f"http://localhost:{os.g
 # Default: 30 m/s = ~67 mph = ~108 km/h
 SPEED_MULTIPLIER = float(os.getenv("GPS_SPEED_MULTIPLIER", "30.0"))
 
+# Route files larger than this are streamed with ijson instead of being read
+# and parsed in one go with orjson
+ROUTE_STREAM_THRESHOLD = 8 * 1024 * 1024
 
-def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+# Seconds between consecutive waypoints
+WAYPOINT_INTERVAL = 1.0
+
+# Maximum number of waypoint POSTs in flight at once
+MAX_IN_FLIGHT = 4
+
+# Reuse keep-alive connections to the ground station across waypoints. Plain
+# urllib3 skips the hooks/adapter/redirect layers requests adds to every call;
+# like requests, a failed POST is reported rather than retried
+HTTP = urllib3.PoolManager(
+    maxsize=MAX_IN_FLIGHT,
+    block=False,
+    timeout=2.0,
+    retries=False,
+    headers={"Content-Type": "application/json"},
+)
+
+# Waypoints are posted from background threads so ground station latency
+# doesn't stretch the time between waypoints
+EXECUTOR = ThreadPoolExecutor(max_workers=MAX_IN_FLIGHT)
+
+
+def haversine_distances(lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
     """
-    Calculate the great circle distance between two points on Earth (in meters).
+    Great circle (haversine) distance between each pair of consecutive points.
     
     Args:
-        lat1, lon1: Latitude and longitude of first point in decimal degrees
-        lat2, lon2: Latitude and longitude of second point in decimal degrees
+        lats, lons: Latitudes and longitudes of the route in decimal degrees
     
     Returns:
-        Distance in meters
+        Array of len(lats) - 1 distances in meters
     """
     # Earth's radius in meters
     R = 6371000
     
-    # Convert to radians
-    phi1 = math.radians(lat1)
-    phi2 = math.radians(lat2)
-    delta_phi = math.radians(lat2 - lat1)
-    delta_lambda = math.radians(lon2 - lon1)
+    phi = np.radians(lats)
+    delta_phi = np.diff(phi)
+    delta_lambda = np.radians(np.diff(lons))
     
-    # Haversine formula
-    a = math.sin(delta_phi / 2) ** 2 + \
-        math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda / 2) ** 2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    a = np.sin(delta_phi / 2) ** 2 + \
+        np.cos(phi[:-1]) * np.cos(phi[1:]) * np.sin(delta_lambda / 2) ** 2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
     
     return R * c
 
 
-def calculate_bearing(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+def calculate_bearings(lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
     """
-    Calculate the bearing (heading) from point 1 to point 2.
+    Initial great circle bearing (heading) from each point to the next.
     
     Args:
-        lat1, lon1: Latitude and longitude of first point in decimal degrees
-        lat2, lon2: Latitude and longitude of second point in decimal degrees
+        lats, lons: Latitudes and longitudes of the route in decimal degrees
     
     Returns:
-        Bearing in degrees (0-360, where 0 is North)
+        Array of len(lats) - 1 bearings in degrees (0-360, where 0 is North)
     """
-    # Convert to radians
-    phi1 = math.radians(lat1)
-    phi2 = math.radians(lat2)
-    delta_lambda = math.radians(lon2 - lon1)
+    phi = np.radians(lats)
+    delta_lambda = np.radians(np.diff(lons))
     
-    # Calculate bearing
-    y = math.sin(delta_lambda) * math.cos(phi2)
-    x = math.cos(phi1) * math.sin(phi2) - \
-        math.sin(phi1) * math.cos(phi2) * math.cos(delta_lambda)
+    y = np.sin(delta_lambda) * np.cos(phi[1:])
+    x = np.cos(phi[:-1]) * np.sin(phi[1:]) - \
+        np.sin(phi[:-1]) * np.cos(phi[1:]) * np.cos(delta_lambda)
     
-    # Convert to degrees and normalize to 0-360
-    bearing = math.degrees(math.atan2(y, x))
-    return (bearing + 360) % 360
+    bearings = np.degrees(np.arctan2(y, x))
+    return (bearings + 360) % 360
 
 
-def load_geojson_route(file_path: str) -> List[Tuple[float, float]]:
+def _stream_route_coordinates(f) -> Iterator:
+    """Incrementally yield [lon, lat] pairs from a large GeoJSON file with ijson."""
+    # Peek at the top-level type without building any values, then rewind
+    geojson_type = next(
+        (value for prefix, event, value in ijson.parse(f) if prefix == 'type' and event == 'string'),
+        None
+    )
+    f.seek(0)
+    
+    if geojson_type in ('FeatureCollection', 'Feature'):
+        # Only one geometry is held in memory at a time
+        prefix = 'features.item.geometry' if geojson_type == 'FeatureCollection' else 'geometry'
+        return (
+            pair
+            for geometry in ijson.items(f, prefix, use_float=True)
+            if geometry and geometry.get('type') == 'LineString'
+            for pair in geometry['coordinates']
+        )
+    if geojson_type == 'LineString':
+        return ijson.items(f, 'coordinates.item', use_float=True)
+    return iter(())
+
+
+def load_geojson_route(file_path: str) -> Tuple[np.ndarray, np.ndarray]:
     """
     Load a GeoJSON file and extract coordinates from LineString features.
     
@@ -84,31 +125,57 @@ def load_geojson_route(file_path: str) -> List[Tuple[float, float]]:
         file_path: Path to the GeoJSON file
     
     Returns:
-        List of (latitude, longitude) tuples
+        (latitudes, longitudes) as two parallel float64 arrays
     """
-    with open(file_path, 'r') as f:
-        geojson = json.load(f)
+    lat_list = []
+    lon_list = []
     
-    coordinates = []
-    
-    if geojson.get('type') == 'FeatureCollection':
-        for feature in geojson.get('features', []):
-            if feature.get('geometry', {}).get('type') == 'LineString':
-                # GeoJSON coordinates are [longitude, latitude]
-                coords = feature['geometry']['coordinates']
-                for lon, lat in coords:
-                    coordinates.append((lat, lon))
-    elif geojson.get('type') == 'Feature':
-        if geojson.get('geometry', {}).get('type') == 'LineString':
-            coords = geojson['geometry']['coordinates']
-            for lon, lat in coords:
-                coordinates.append((lat, lon))
-    elif geojson.get('type') == 'LineString':
-        coords = geojson.get('coordinates', [])
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size <= ROUTE_STREAM_THRESHOLD:
+            # Small routes are parsed in one shot; orjson is much faster than
+            # streaming when the whole document fits comfortably in memory
+            geojson = orjson.loads(f.read())
+            geojson_type = geojson.get('type')
+            if geojson_type == 'FeatureCollection':
+                geometries = (feature.get('geometry') for feature in geojson.get('features', []))
+            elif geojson_type == 'Feature':
+                geometries = (geojson.get('geometry'),)
+            elif geojson_type == 'LineString':
+                geometries = (geojson,)
+            else:
+                geometries = ()
+            coords = (
+                pair
+                for geometry in geometries
+                if geometry and geometry.get('type') == 'LineString'
+                for pair in geometry['coordinates']
+            )
+        else:
+            coords = _stream_route_coordinates(f)
+        
+        # GeoJSON coordinates are [longitude, latitude]
         for lon, lat in coords:
-            coordinates.append((lat, lon))
+            lat_list.append(lat)
+            lon_list.append(lon)
     
-    return coordinates
+    return np.asarray(lat_list, dtype=np.float64), np.asarray(lon_list, dtype=np.float64)
+
+
+def route_segments(lats: np.ndarray, lons: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Precompute the heading and simulated speed from each waypoint to the next.
+    
+    Args:
+        lats, lons: Latitudes and longitudes of the route in decimal degrees
+    
+    Returns:
+        (headings in degrees, speeds in meters per second), each of len(lats) - 1
+    """
+    headings = calculate_bearings(lats, lons)
+    # Speed = distance / time between waypoints, scaled by the speed multiplier
+    # relative to the 30 m/s the routes are drawn for
+    speeds = haversine_distances(lats, lons) * (SPEED_MULTIPLIER / 30.0 / WAYPOINT_INTERVAL)
+    return headings, speeds
 
 
 def find_route_file() -> Optional[str]:
@@ -136,78 +203,122 @@ def find_route_file() -> Optional[str]:
     return None
 
 
-def simulate_gps_data(coordinates: List[Tuple[float, float]]) -> None:
+# Waypoint JSON (matching gpsDataSchema) is formatted straight into bytes;
+# only the numbers and the timestamp change between waypoints
+GPS_JSON_TEMPLATE = b'{"type":"gps","latitude":%.6f,"longitude":%.6f,"timestamp":"%s"'
+GPS_JSON_HEADING = b',"heading":%.6f'
+GPS_JSON_SPEED = b',"speed":%.6f'  # meters per second
+
+# Second-resolution part of the current UTC timestamp, reformatted once per second
+_timestamp_second = None
+_timestamp_prefix = b""
+
+
+def utc_timestamp() -> bytes:
+    """Current UTC time as ISO-8601 bytes with microseconds, e.g. b"2024-01-01T12:00:00.123456Z"."""
+    global _timestamp_second, _timestamp_prefix
+
+    second, ns = divmod(time.time_ns(), 1_000_000_000)
+    if second != _timestamp_second:
+        _timestamp_second = second
+        _timestamp_prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second)).encode()
+    return b"%s.%06dZ" % (_timestamp_prefix, ns // 1000)
+
+
+# Terminal log lines, only formatted when LOG_TO_TERMINAL is set
+WAYPOINT_LOG = "[GPS] Waypoint %d/%d: lat=%.6f, lon=%.6f (%.1f km/h), heading: %.1f°"
+LAST_WAYPOINT_LOG = "[GPS] Waypoint %d/%d: lat=%.6f, lon=%.6f"
+
+
+def report_send(future: Future) -> None:
+    """Log the outcome of a finished waypoint POST."""
+    try:
+        response = future.result()
+        if LOG_TO_TERMINAL:
+            print(f"[GPS] Ground station response: {response.status}")
+    except urllib3.exceptions.HTTPError as e:
+        if LOG_TO_TERMINAL:
+            print(f"[GPS] Failed to send data to ground station: {e}")
+
+
+def reap_sends(in_flight: deque) -> None:
+    """Report finished sends; if too many are still pending, wait for the oldest."""
+    while in_flight and (in_flight[0].done() or len(in_flight) >= MAX_IN_FLIGHT):
+        report_send(in_flight.popleft())
+
+
+def simulate_gps_data(lats: np.ndarray, lons: np.ndarray,
+                      headings: np.ndarray, speeds: np.ndarray) -> None:
     """
     Simulate GPS data by iterating through coordinates and sending to ground station.
     
     Args:
-        coordinates: List of (latitude, longitude) tuples
+        lats, lons: Parallel arrays of waypoint latitudes and longitudes
+        headings, speeds: Per-segment values from route_segments
     """
-    if not coordinates:
+    n = len(lats)
+    if n == 0:
         print("[GPS] No coordinates found in route file")
         return
     
-    print(f"[GPS] Starting simulation with {len(coordinates)} waypoints")
+    print(f"[GPS] Starting simulation with {n} waypoints")
+    
+    # Hoist everything the loop touches into locals; iterating Python floats
+    # also avoids boxing a NumPy scalar per element
+    url = f"{GROUND_STATION_URL}/data"
+    submit = EXECUTOR.submit
+    request = HTTP.request
+    timestamp = utc_timestamp
+    sleep = time.sleep
+    monotonic = time.monotonic
+    log = LOG_TO_TERMINAL
+    lat_list = lats.tolist()
+    lon_list = lons.tolist()
     
+    in_flight = deque()
     try:
-        for i in range(len(coordinates)):
-            lat, lon = coordinates[i]
+        # Waypoints are scheduled against the monotonic clock so the time spent
+        # building and submitting each one doesn't accumulate as drift
+        next_tick = monotonic()
+        
+        # Every waypoint but the last has a next point to head towards
+        for i, (lat, lon, heading, speed) in enumerate(
+            zip(lat_list, lon_list, headings.tolist(), speeds.tolist())
+        ):
+            reap_sends(in_flight)
             
-            # Calculate heading (bearing to next point)
-            heading = None
-            if i < len(coordinates) - 1:
-                next_lat, next_lon = coordinates[i + 1]
-                heading = calculate_bearing(lat, lon, next_lat, next_lon)
-            
-            # Calculate speed based on distance to next point
-            speed = None
-            if i < len(coordinates) - 1:
-                next_lat, next_lon = coordinates[i + 1]
-                distance_meters = haversine_distance(lat, lon, next_lat, next_lon)
-                # Speed = distance / time, where time = 1 second
-                speed = distance_meters / 1.0  # meters per second
-                # Apply speed multiplier if set
-                speed = speed * (SPEED_MULTIPLIER / 30.0) if SPEED_MULTIPLIER != 30.0 else speed
-                # Convert to km/h for display (optional, but common unit)
-                speed_kmh = speed * 3.6
-            
-            # Create GPS data object matching gpsDataSchema
-            gps_data = {
-                'type': 'gps',
-                'latitude': lat,
-                'longitude': lon,
-                'timestamp': datetime.utcnow().isoformat() + 'Z',
-            }
-            
-            # Add optional fields if available
-            if heading is not None:
-                gps_data['heading'] = heading
-            if speed is not None:
-                gps_data['speed'] = speed  # meters per second
+            # Create GPS JSON payload matching gpsDataSchema
+            body = (GPS_JSON_TEMPLATE % (lat, lon, timestamp())
+                    + GPS_JSON_HEADING % heading
+                    + GPS_JSON_SPEED % speed
+                    + b"}")
             
             # Conditionally print to terminal
-            if LOG_TO_TERMINAL:
-                speed_str = f" ({speed_kmh:.1f} km/h)" if speed is not None else ""
-                heading_str = f", heading: {heading:.1f}°" if heading is not None else ""
-                print(f"[GPS] Waypoint {i+1}/{len(coordinates)}: "
-                      f"lat={lat:.6f}, lon={lon:.6f}{speed_str}{heading_str}")
+            if log:
+                # Convert to km/h for display (optional, but common unit)
+                print(WAYPOINT_LOG % (i + 1, n, lat, lon, speed * 3.6, heading))
             
             # Send data to ground station
-            try:
-                response = requests.post(
-                    f"{GROUND_STATION_URL}/data",
-                    json=gps_data,
-                    timeout=2
-                )
-                if LOG_TO_TERMINAL:
-                    print(f"[GPS] Ground station response: {response.status_code}")
-            except requests.exceptions.RequestException as e:
-                if LOG_TO_TERMINAL:
-                    print(f"[GPS] Failed to send data to ground station: {e}")
+            in_flight.append(submit(request, "POST", url, body=body))
             
-            # Wait 1 second before next waypoint (except for last one)
-            if i < len(coordinates) - 1:
-                time.sleep(1)
+            # Wait until the next waypoint is due
+            next_tick += WAYPOINT_INTERVAL
+            delay = next_tick - monotonic()
+            if delay > 0:
+                sleep(delay)
+            else:
+                next_tick = monotonic()
+        
+        # The last waypoint has no heading or speed
+        reap_sends(in_flight)
+        lat, lon = lat_list[-1], lon_list[-1]
+        body = GPS_JSON_TEMPLATE % (lat, lon, timestamp()) + b"}"
+        if log:
+            print(LAST_WAYPOINT_LOG % (n, n, lat, lon))
+        in_flight.append(submit(request, "POST", url, body=body))
+        
+        while in_flight:
+            report_send(in_flight.popleft())
     
     except KeyboardInterrupt:
         print("\n[GPS] Simulation interrupted by user")
@@ -231,16 +342,19 @@ def main():
     
     # Load coordinates from GeoJSON
     try:
-        coordinates = load_geojson_route(route_file)
+        lats, lons = load_geojson_route(route_file)
     except Exception as e:
         print(f"[GPS] Failed to load route file: {e}")
         return
     
-    if not coordinates:
+    if len(lats) == 0:
         print("[GPS] No coordinates found in route file")
         return
     
-    print(f"[GPS] Loaded {len(coordinates)} waypoints")
+    # Heading and speed only depend on the route, so compute them once for every replay
+    headings, speeds = route_segments(lats, lons)
+    
+    print(f"[GPS] Loaded {len(lats)} waypoints")
     print(f"[GPS] Starting simulation (1 waypoint per second)")
     print(f"[GPS] Ground station URL: {GROUND_STATION_URL}")
     print(f"[GPS] Speed multiplier: {SPEED_MULTIPLIER} m/s")
@@ -249,11 +363,14 @@ def main():
     # Run simulation in a loop (restart from beginning when done)
     try:
         while True:
-            simulate_gps_data(coordinates)
+            simulate_gps_data(lats, lons, headings, speeds)
             print("\n[GPS] Route completed. Restarting from beginning...\n")
             time.sleep(1)
     except KeyboardInterrupt:
         print("\n[GPS] Shutting down...")
+    finally:
+        EXECUTOR.shutdown(wait=False, cancel_futures=True)
+        HTTP.clear()
 
 
 if __name__ == "__main__":
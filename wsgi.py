@@ -0,0 +1,10 @@
+# Production entry point for the dashboard:
+#   gunicorn -k gevent -w 1 --worker-connections 1000 -b 0.0.0.0:5000 wsgi:app
+#
+# Patch blocking stdlib primitives (sockets, locks, queue.Queue) before the
+# app is imported, so SSE clients waiting on their queues yield to other
+# connections instead of each occupying a worker.
+from gevent import monkey
+monkey.patch_all()
+
+from dashboard import app  # noqa: E402,F401